@@ -1,23 +1,48 @@
+import asyncio
+
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-import os, time, glob, shutil, logging, traceback
-from typing import Optional
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
+import atexit
+import os, re, time, shutil, logging, tempfile, traceback
+import queue
+import threading
+import requests
+
+# watchdog is optional - when present, downloads are detected via inotify
+# events instead of polling the directory
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Selenium's own loggers are chatty at INFO; keep them to warnings
+logging.getLogger("selenium").setLevel(logging.WARNING)
 
 app = FastAPI()
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
 # ========== Models ==========
 
 class ScrapeRequest(BaseModel):
@@ -33,160 +58,372 @@ class UploadRequest(BaseModel):
     download_link: str
     run_id: str
 
+class BatchDownloadRequest(BaseModel):
+    email: str
+    password: str
+    download_links: List[str]
+    run_id: str
+
 # ========== Download Helper ==========
 
-def wait_for_download(download_dir, timeout=120):
-    """Improved download detection with better file handling"""
-    logger.info("⏳ Waiting for file download and release...")
+# Root for anything that must outlive a single request (batch results, old-
+# download cleanup); per-request browser downloads use their own temp dirs
+DOWNLOAD_ROOT = os.getenv("DOWNLOAD_ROOT", os.path.join(tempfile.gettempdir(), "vayne_downloads"))
+
+TEMP_DOWNLOAD_SUFFIXES = (".crdownload", ".tmp", ".part")
+
+# Put per-request download dirs on the RAM-backed tmpfs when the host has
+# one - the CSV then never touches disk between Chrome and the response
+_TMPFS_BASE = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+def _scan_download_dir(download_dir):
+    """Single-pass directory scan returning completed download entries
+
+    os.scandir gives file type and stat in one pass, so each poll tick
+    costs one syscall per entry instead of a glob plus repeated stats.
+    """
+    with os.scandir(download_dir) as it:
+        return [
+            entry for entry in it
+            if entry.is_file(follow_symlinks=False)
+            and not entry.name.endswith(TEMP_DOWNLOAD_SUFFIXES)
+            and entry.stat().st_size > 0  # Ensure file has content
+        ]
+
+def _is_file_stable(path):
+    """Check that a file's size has settled and its handle is released"""
+    try:
+        size1 = os.path.getsize(path)
+        time.sleep(0.2)
+        size2 = os.path.getsize(path)
+
+        if size1 == size2 and size1 > 0:
+            # Try to open the file to ensure it's not locked
+            with open(path, "rb") as test_file:
+                test_file.read(1024)  # Read a small chunk
+            return True
+
+        logger.debug("📝 File still being written: %s -> %s bytes", size1, size2)
+    except (PermissionError, OSError) as e:
+        logger.warning("⚠️ File access error: %s", e)
+    return False
+
+def _find_new_download(download_dir, preexisting):
+    """Return the newest completed download that wasn't there at the start"""
+    try:
+        new_files = [
+            entry for entry in _scan_download_dir(download_dir)
+            if entry.name not in preexisting
+        ]
+    except OSError as e:
+        logger.warning("⚠️ Error checking downloads: %s", e)
+        return None
+
+    if not new_files:
+        return None
+    # st_ctime_ns avoids the float conversion and keeps full timer resolution
+    return max(new_files, key=lambda entry: entry.stat().st_ctime_ns).path
+
+def _wait_for_download_poll(download_dir, timeout, preexisting):
+    """Fallback download detection via a tight scandir poll"""
     end_time = time.time() + timeout
-    last_file_count = 0
-    stable_count = 0
 
     while time.time() < end_time:
-        try:
-            # Get all files in download directory
-            files = glob.glob(os.path.join(download_dir, "*"))
-            
-            # Filter out temporary files
-            valid_files = [
-                f for f in files
-                if not f.endswith(".crdownload") 
-                and not f.endswith(".tmp") 
-                and not f.endswith(".part")
-                and os.path.isfile(f)
-                and os.path.getsize(f) > 0  # Ensure file has content
-            ]
-
-            current_file_count = len(valid_files)
-            logger.info(f"📁 Files in download dir: {current_file_count} (valid), {len(files)} (total)")
-
-            # Check if we have a new file
-            if current_file_count > last_file_count:
-                latest_file = max(valid_files, key=os.path.getctime)
-                logger.info(f"📄 Found potential download: {os.path.basename(latest_file)}")
-                
-                # Check if file is stable (not being written to)
-                try:
-                    size1 = os.path.getsize(latest_file)
-                    time.sleep(3)  # Wait a bit longer
-                    size2 = os.path.getsize(latest_file)
-                    
-                    if size1 == size2 and size1 > 0:
-                        # Try to open the file to ensure it's not locked
-                        with open(latest_file, "rb") as test_file:
-                            test_file.read(1024)  # Read a small chunk
-                        
-                        logger.info(f"✅ File is stable and unlocked: {latest_file} ({size2} bytes)")
-                        return os.path.abspath(latest_file)
-                    else:
-                        logger.info(f"📝 File still being written: {size1} -> {size2} bytes")
-                        
-                except (PermissionError, OSError) as e:
-                    logger.warning(f"⚠️ File access error: {e}")
-                    
-            elif current_file_count == last_file_count and current_file_count > 0:
-                stable_count += 1
-                if stable_count > 5:  # File count stable for 5 iterations
-                    latest_file = max(valid_files, key=os.path.getctime)
-                    if os.path.getsize(latest_file) > 0:
-                        return os.path.abspath(latest_file)
-
-            last_file_count = current_file_count
-            time.sleep(2)  # Check every 2 seconds
+        latest_file = _find_new_download(download_dir, preexisting)
+        if latest_file:
+            logger.debug("📄 Found potential download: %s", os.path.basename(latest_file))
+            if _is_file_stable(latest_file):
+                logger.info("✅ File is stable and unlocked: %s", latest_file)
+                return os.path.abspath(latest_file)
 
-        except Exception as e:
-            logger.warning(f"⚠️ Error checking downloads: {e}")
-            time.sleep(2)
+        time.sleep(0.1)  # Tight poll - reacts quickly once the file lands
+
+    raise TimeoutError(f"⛔ File did not fully download or unlock in {timeout} seconds.")
+
+def _wait_for_download_event(download_dir, timeout, preexisting):
+    """Event-driven download detection - the kernel signals file changes
+
+    An inotify watch fires the moment Chrome renames the .crdownload file
+    to its final name, so completion is detected instantly instead of on
+    the next poll tick.
+    """
+    changed = threading.Event()
+
+    class _DownloadHandler(FileSystemEventHandler):
+        def _mark(self, path):
+            if not path.endswith(TEMP_DOWNLOAD_SUFFIXES):
+                changed.set()
+
+        def on_created(self, event):
+            if not event.is_directory:
+                self._mark(event.src_path)
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                self._mark(event.dest_path)
+
+        def on_modified(self, event):
+            if not event.is_directory:
+                self._mark(event.src_path)
+
+    observer = Observer()
+    observer.schedule(_DownloadHandler(), download_dir)
+    observer.start()
+    end_time = time.time() + timeout
+
+    try:
+        # The download may already have landed before the watch was armed
+        changed.set()
+
+        while True:
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                break
+            # Cap the block so a missed event (a rename the handler doesn't
+            # map, or a stability check that raced the final write) degrades
+            # to a 0.5s poll instead of waiting out the whole timeout
+            changed.wait(timeout=min(0.5, remaining))
+            changed.clear()
+
+            latest_file = _find_new_download(download_dir, preexisting)
+            if latest_file and _is_file_stable(latest_file):
+                logger.info("✅ File is stable and unlocked: %s", latest_file)
+                return os.path.abspath(latest_file)
+    finally:
+        observer.stop()
+        observer.join()
 
     raise TimeoutError(f"⛔ File did not fully download or unlock in {timeout} seconds.")
 
+def snapshot_download_dir(download_dir):
+    """Names already present in the download dir, for seeding the wait
+
+    Callers should take this snapshot before triggering the navigation that
+    starts the download - snapshotting afterwards can misclassify a download
+    that finished quickly as preexisting and then wait out the full timeout.
+    """
+    try:
+        return {entry.name for entry in _scan_download_dir(download_dir)}
+    except OSError:
+        return set()
+
+def wait_for_download(download_dir, timeout=120, preexisting=None):
+    """Improved download detection with better file handling"""
+    logger.info("⏳ Waiting for file download and release...")
+
+    # Seed with whatever is already in the directory so a stale file from a
+    # previous run is never mistaken for the new download
+    if preexisting is None:
+        preexisting = snapshot_download_dir(download_dir)
+
+    if WATCHDOG_AVAILABLE:
+        return _wait_for_download_event(download_dir, timeout, preexisting)
+    return _wait_for_download_poll(download_dir, timeout, preexisting)
+
+# ========== HTTP Session Helper ==========
+
+def session_from_driver(driver):
+    """Build a requests.Session that reuses the browser's authenticated cookies
+
+    Once the browser has logged in, plain HTTP transfers (file downloads,
+    form posts) don't need a page load - a requests session carrying the
+    same cookies and user agent can talk to the server directly.
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+        )
+    return session
+
 # ========== Improved Chrome Setup ==========
 
-def setup_chrome_driver(download_dir: Optional[str] = None):
+# When set, drivers are sessions on a Selenium Grid / standalone-chrome
+# container instead of locally launched Chrome processes
+GRID_URL = os.getenv("SELENIUM_GRID_URL")
+
+# Resource types the scraper never looks at; CSS blocking is opt-in since it
+# can break sites that gate rendering on stylesheets
+BLOCKED_RESOURCE_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.webp", "*.gif", "*.svg", "*.woff", "*.woff2",
+    # Tracking scripts add latency on every page and the scraper never needs them
+    "*analytics*", "*gtm*", "*doubleclick*",
+]
+if os.getenv("CHROME_BLOCK_CSS") == "1":
+    BLOCKED_RESOURCE_URLS.append("*.css")
+
+def block_static_resources(driver):
+    """Stop the browser fetching images and fonts the scraper never renders"""
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_URLS})
+    except WebDriverException as e:
+        logger.warning("⚠️ Could not set CDP resource blocking: %s", e)
+
+def configure_download_dir(driver, download_dir):
+    """Point an existing driver's downloads at the given directory via CDP"""
+    if not hasattr(driver, "execute_cdp_cmd"):
+        # Remote grid sessions don't expose the CDP command channel
+        return
+    try:
+        driver.execute_cdp_cmd(
+            "Browser.setDownloadBehavior",
+            {"behavior": "allow", "downloadPath": download_dir},
+        )
+    except WebDriverException as e:
+        logger.warning("⚠️ Could not set CDP download behavior: %s", e)
+
+PROFILE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chrome-profiles")
+
+# The full Chrome flag set, built once at import so setup_chrome_driver
+# doesn't re-run 40 add_argument calls per browser launch and the whole
+# configuration is auditable in one place
+_CHROME_ARGS = (
+    # Basic headless configuration
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    # Disable automation detection
+    "--disable-blink-features=AutomationControlled",
+    # Disable unnecessary services that cause errors
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-ipc-flooding-protection",
+    # Disable Google services and GCM
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-client-side-phishing-detection",
+    "--disable-hang-monitor",
+    "--disable-prompt-on-repost",
+    "--disable-domain-reliability",
+    # Disable ML/AI features that cause TensorFlow errors
+    "--disable-machine-learning-service",
+    "--disable-ml-service",
+    # Disable logging and notifications
+    "--disable-logging",
+    "--disable-extensions",
+    "--disable-notifications",
+    "--disable-web-security",
+    "--allow-running-insecure-content",
+    # Performance improvements
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-popup-blocking",
+    "--window-size=1280,800",
+    # Set user agent to avoid detection
+    f"--user-agent={USER_AGENT}",
+    # Suppress log levels to reduce console noise
+    "--log-level=3",  # Only show fatal errors
+    "--silent",
+    # Startup-cost reducers - kill crash reporting, metrics and audio,
+    # and collapse a few more background feature pipelines
+    "--no-zygote",
+    "--disable-breakpad",
+    "--disable-crash-reporter",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--enable-low-end-device-mode",
+    # Chrome only honors the last --disable-features switch on the command
+    # line, so every disabled feature has to live in this one argument:
+    # translate UI, optimization/ML hints, compositing trial, plus the
+    # startup-cost reducers
+    "--disable-features=TranslateUI,TranslateBubbleUI,OptimizationHints,VizDisplayCompositor,RendererCodeIntegrity,InterestFeedContentSuggestions,CalculateNativeWinOcclusion",
+    # Renderer-level image switch (the CDP blocklist stops the fetches, this
+    # stops decode work for anything inlined) and a 256MB V8 heap cap so one
+    # leaky page can't balloon a pooled driver
+    "--blink-settings=imagesEnabled=false",
+    "--js-flags=--max-old-space-size=256",
+    # Cap the asset cache at 100MB; the cache dir itself is set per driver
+    # since Chrome requires exclusive access to it
+    "--disk-cache-size=104857600",
+    # Collapse the per-site renderer fan-out - the scraper only ever visits
+    # one origin at a time, so site isolation buys nothing but extra processes
+    "--disable-site-isolation-trials",
+    "--process-per-site",
+)
+
+# --single-process collapses Chrome to a single OS process - the biggest
+# memory saving available, but it trades away crash isolation and can be
+# unstable on some sites, so it stays opt-in
+if os.getenv("CHROME_SINGLE_PROC") == "1":
+    _CHROME_ARGS += ("--single-process",)
+
+# Download preferences shared by every driver; the per-request directory is
+# merged in at launch time
+_BASE_PREFS = {
+    "download.prompt_for_download": False,
+    "download.directory_upgrade": True,
+    "safebrowsing.enabled": False,  # Disable safe browsing
+    "safebrowsing.disable_download_protection": True,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_settings.popups": 0,
+    "profile.managed_default_content_settings.images": 2  # Don't load images
+}
+
+def setup_chrome_driver(download_dir: Optional[str] = None, profile_dir: Optional[str] = None):
     """Setup Chrome WebDriver with comprehensive error suppression"""
     try:
         options = Options()
-        
-        # Basic headless configuration
-        options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-software-rasterizer")
-        
-        # Disable automation detection
-        options.add_argument("--disable-blink-features=AutomationControlled")
+        # driver.get returns on DOMContentLoaded instead of the full load
+        # event - the form elements the scraper needs exist by then
+        options.page_load_strategy = "eager"
+        for arg in _CHROME_ARGS:
+            options.add_argument(arg)
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
-        
-        # Disable unnecessary services that cause errors
-        options.add_argument("--disable-background-timer-throttling")
-        options.add_argument("--disable-backgrounding-occluded-windows")
-        options.add_argument("--disable-renderer-backgrounding")
-        options.add_argument("--disable-features=TranslateUI")
-        options.add_argument("--disable-ipc-flooding-protection")
-        
-        # Disable Google services and GCM
-        options.add_argument("--disable-sync")
-        options.add_argument("--disable-default-apps")
-        options.add_argument("--disable-background-networking")
-        options.add_argument("--disable-component-update")
-        options.add_argument("--disable-client-side-phishing-detection")
-        options.add_argument("--disable-hang-monitor")
-        options.add_argument("--disable-prompt-on-repost")
-        options.add_argument("--disable-domain-reliability")
-        
-        # Disable ML/AI features that cause TensorFlow errors
-        options.add_argument("--disable-features=OptimizationHints")
-        options.add_argument("--disable-features=VizDisplayCompositor")
-        options.add_argument("--disable-features=TranslateBubbleUI")
-        options.add_argument("--disable-machine-learning-service")
-        options.add_argument("--disable-ml-service")
-        
-        # Disable logging and notifications
-        options.add_argument("--disable-logging")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-notifications")
-        options.add_argument("--disable-web-security")
-        options.add_argument("--allow-running-insecure-content")
-        
-        # Performance improvements
-        options.add_argument("--no-first-run")
-        options.add_argument("--no-default-browser-check")
-        options.add_argument("--disable-popup-blocking")
-        options.add_argument("--start-maximized")
-        
-        # Set user agent to avoid detection
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Suppress log levels to reduce console noise
-        options.add_argument("--log-level=3")  # Only show fatal errors
-        options.add_argument("--silent")
-        
+
+        # Persistent profile keeps login cookies across process restarts;
+        # without one, fall back to a disposable dir that at least skips
+        # default-profile loading at startup. Grid nodes manage their own
+        # profiles, so local paths are only passed to local Chrome.
+        if not GRID_URL:
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+                options.add_argument(f"--user-data-dir={profile_dir}")
+                # Chrome's disk cache assumes exclusive access per running
+                # instance, so each slot keeps its own inside its profile
+                # dir, where it also persists across restarts
+                options.add_argument(f"--disk-cache-dir={os.path.join(profile_dir, 'cache')}")
+            else:
+                options.add_argument(f"--user-data-dir={tempfile.mkdtemp(prefix='chrome_profile_')}")
+
         # Set download preferences if download_dir is provided
         if download_dir:
-            prefs = {
-                "download.default_directory": download_dir,
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": False,  # Disable safe browsing
-                "safebrowsing.disable_download_protection": True,
-                "profile.default_content_setting_values.notifications": 2,
-                "profile.default_content_settings.popups": 0,
-                "profile.managed_default_content_settings.images": 2  # Don't load images
-            }
-            options.add_experimental_option("prefs", prefs)
+            options.add_experimental_option(
+                "prefs", {**_BASE_PREFS, "download.default_directory": download_dir}
+            )
         
-        # Create service with reduced logging
-        service = Service()
-        service.log_level = 'OFF'  # Disable ChromeDriver logs
-        
-        # Initialize driver
-        driver = webdriver.Chrome(service=service, options=options)
+        # Initialize driver - a pooled grid session when configured, else a
+        # locally launched Chrome behind a quiet chromedriver service
+        if GRID_URL:
+            driver = webdriver.Remote(command_executor=GRID_URL, options=options)
+        else:
+            service = Service()
+            service.log_level = 'OFF'  # Disable ChromeDriver logs
+            driver = webdriver.Chrome(service=service, options=options)
         driver.set_page_load_timeout(45)
         
         # Execute script to remove webdriver property
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+        # Stricter than the images pref - the requests never leave Chrome
+        block_static_resources(driver)
+
+        # Enforce the download target at the CDP level as well - the prefs
+        # alone are ignored by some headless builds
+        if download_dir:
+            configure_download_dir(driver, download_dir)
         
         logger.info("✅ Chrome WebDriver initialized successfully")
         return driver
@@ -198,134 +435,484 @@ def setup_chrome_driver(download_dir: Optional[str] = None):
         logger.error("❌ Unexpected error in WebDriver setup: %s", e)
         raise HTTPException(status_code=500, detail=f"Unexpected WebDriver error: {str(e)}")
 
+# ========== Warm Driver Pool ==========
+
+class DriverPool:
+    """Bounded pool of warm Chrome drivers reused across requests
+
+    Cold-starting Chrome costs seconds per request; keeping a small pool of
+    already-running drivers amortizes that across calls. Drivers are created
+    lazily up to the pool size and health-checked before being put back.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._queue = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        # Each pool slot owns a persistent profile dir so login cookies
+        # survive both driver recycling and process restarts
+        self._free_slots = list(range(size))
+
+    def _spawn(self):
+        """Create a new driver if a pool slot is free, else return None"""
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+            slot = self._free_slots.pop()
+        try:
+            profile_dir = os.path.join(PROFILE_ROOT, f"profile_{slot}")
+            driver = setup_chrome_driver(profile_dir=profile_dir)
+            driver._vayne_profile_slot = slot
+            if not GRID_URL:
+                driver._vayne_profile_dir = profile_dir
+                # The profile's cookies belong to whichever account last
+                # logged in on this slot - restore that so the wrong-account
+                # guard still fires after a restart or driver recycle
+                driver._vayne_email = _read_profile_email(profile_dir)
+            return driver
+        except Exception:
+            with self._lock:
+                self._created -= 1
+                self._free_slots.append(slot)
+            raise
+
+    def prefill(self):
+        """Create the full complement of drivers up front
+
+        Called at startup so the first requests don't pay the Chrome cold
+        start. Stops early (with a warning) if a browser can't be launched.
+        """
+        warmed = 0
+        while True:
+            try:
+                driver = self._spawn()
+            except Exception as e:
+                logger.warning("⚠️ Could not prewarm driver: %s", e)
+                break
+            if driver is None:
+                break
+            self._queue.put(driver)
+            warmed += 1
+        logger.info("✅ Driver pool prewarmed with %d driver(s)", warmed)
+
+    def acquire(self, timeout: int = 60):
+        """Get a warm driver, creating one if the pool isn't full yet"""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        driver = self._spawn()
+        if driver is not None:
+            return driver
+
+        return self._queue.get(timeout=timeout)
+
+    def release(self, driver):
+        """Return a driver to the pool, discarding it if it looks unhealthy
+
+        The driver is parked on about:blank so no page state (or pending
+        navigation) leaks into the next request; cookies are kept so a
+        still-valid login can be reused. Long-lived Chrome processes slowly
+        accumulate renderer memory, so each driver is retired after a fixed
+        number of uses and lazily replaced by a fresh one.
+        """
+        if driver is None:
+            return
+        driver._vayne_uses = getattr(driver, "_vayne_uses", 0) + 1
+        if driver._vayne_uses >= MAX_USES_PER_INSTANCE:
+            logger.info("🔁 Recycling pooled driver after %d uses", driver._vayne_uses)
+            self.discard(driver)
+            return
+        try:
+            driver.get("about:blank")  # Health probe doubling as state reset
+            self._queue.put_nowait(driver)
+        except Exception:
+            self.discard(driver)
+
+    def discard(self, driver):
+        """Quit a driver and free its pool slot"""
+        with self._lock:
+            self._created -= 1
+            slot = getattr(driver, "_vayne_profile_slot", None)
+            if slot is not None:
+                self._free_slots.append(slot)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("⚠️ Error quitting pooled driver: %s", e)
+
+    def drain(self):
+        """Quit every idle driver in the pool"""
+        while True:
+            try:
+                driver = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(driver)
+
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "4"))
+
+# Retire a driver after this many requests - bounds Chrome's slow memory creep
+MAX_USES_PER_INSTANCE = int(os.getenv("MAX_USES_PER_INSTANCE", "50"))
+driver_pool = DriverPool(DRIVER_POOL_SIZE)
+
+# Bounds how many Selenium flows run at once; keeps the event loop free for
+# /health and new requests while scrapes grind away in worker threads
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONC", str(DRIVER_POOL_SIZE)))
+request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Belt and braces: drain the pool even if the server dies outside FastAPI's
+# shutdown hook, so no orphan Chrome processes are left behind
+atexit.register(driver_pool.drain)
+
 # ========== Safe Element Interaction ==========
 
-def safe_find_element(driver, wait, by, selector, timeout=15, description="element"):
+# Locators built once at import - callers pass these tuples around instead of
+# reassembling (By, selector) pairs on every request
+EMAIL_LOC = (By.ID, "user_email")
+PASSWORD_LOC = (By.ID, "user_password")
+TOKEN_INPUT_LOC = (By.CSS_SELECTOR, "input[type='text']")
+# Text is the only discriminator for the Update button, so it is found with
+# a querySelectorAll scan in-page (XPath text matching walks every node in
+# chromedriver); this stays as the fallback locator
+UPDATE_BTN_LOC = (By.XPATH, "//button[normalize-space(text())='Update']")
+URL_INPUT_LOC = (By.CSS_SELECTOR, "textarea[name='url_check[url]']")
+CHECK_URL_BTN_LOC = (By.CSS_SELECTOR, "a[data-action='order-creation#checkUrl']")
+ORDER_LIMIT_LOC = (By.ID, "order_limit")
+CREATE_ORDER_BTN_LOC = (By.CSS_SELECTOR, "input[type='submit'][value='Create Order']")
+ORDERS_CONTAINER_LOC = (By.ID, "order_items_leads")
+LATEST_ORDER_LOC = (By.CSS_SELECTOR, "li.col-span-1")
+
+# The create-order POST redirects to the new order's page - its URL carries
+# the ID, saving a trip to /orders to scrape it out of the DOM
+_ORDER_URL_RE = re.compile(r"/orders/(\d+)")
+
+def driver_wait(driver, timeout=30):
+    """Return a WebDriverWait cached on the driver, one per timeout
+
+    Pooled drivers serve many requests; reusing the wait objects avoids
+    rebuilding them (and their poll bookkeeping) on every endpoint call.
+    """
+    waits = getattr(driver, "_vayne_waits", None)
+    if waits is None:
+        waits = driver._vayne_waits = {}
+    wait = waits.get(timeout)
+    if wait is None:
+        # 0.1s polling instead of the 0.5s default - conditions that are
+        # already true cost ~50ms of lag on average instead of ~250ms, and
+        # stale references mid-rerender just mean "poll again"
+        wait = waits[timeout] = WebDriverWait(
+            driver,
+            timeout,
+            poll_frequency=0.1,
+            ignored_exceptions=(StaleElementReferenceException,),
+        )
+    return wait
+
+def safe_find_element(driver, wait, locator, timeout=15, description="element"):
     """Safely find an element with proper error handling"""
     try:
-        logger.info(f"🔍 Looking for {description}: {selector}")
-        element = wait.until(EC.presence_of_element_located((by, selector)))
-        logger.info(f"✅ Found {description}")
+        logger.info("🔍 Looking for %s: %s", description, locator[1])
+        element = wait.until(EC.presence_of_element_located(locator))
+        logger.info("✅ Found %s", description)
         return element
     except TimeoutException:
-        logger.error(f"❌ Timeout waiting for {description}: {selector}")
+        logger.error("❌ Timeout waiting for %s: %s", description, locator[1])
         # Take a screenshot for debugging if possible
         try:
             driver.save_screenshot(f"error_{description.replace(' ', '_')}.png")
-            logger.info(f"📸 Screenshot saved for debugging: error_{description.replace(' ', '_')}.png")
+            logger.info("📸 Screenshot saved for debugging: error_%s.png", description.replace(' ', '_'))
         except:
             pass
         raise HTTPException(status_code=500, detail=f"Could not find {description} on page")
     except Exception as e:
-        logger.error(f"❌ Error finding {description}: {e}")
+        logger.error("❌ Error finding %s: %s", description, e)
         raise HTTPException(status_code=500, detail=f"Error locating {description}: {str(e)}")
 
-def safe_click(driver, wait, element, description="element"):
-    """Safely click an element with proper error handling"""
+def safe_click(driver, wait, element, description="element", next_locator=None):
+    """Safely click an element with proper error handling
+
+    Instead of sleeping after the click, callers pass the locator of the
+    element they need next - the wait returns the moment the page has
+    actually responded.
+    """
     try:
-        logger.info(f"🖱️ Clicking {description}")
-        # Scroll element into view first
-        driver.execute_script("arguments[0].scrollIntoView(true);", element)
-        time.sleep(1)
-        
-        # Wait for element to be clickable
+        logger.info("🖱️ Clicking %s", description)
         wait.until(EC.element_to_be_clickable(element))
-        
-        # Use JavaScript click for reliability
-        driver.execute_script("arguments[0].click();", element)
-        logger.info(f"✅ Clicked {description}")
-        time.sleep(2)
+        try:
+            # One input pipeline round trip: scroll, hover and click together
+            ActionChains(driver).move_to_element(element).click().perform()
+        except WebDriverException:
+            # Overlapping elements can swallow native clicks - fall back to JS
+            driver.execute_script("arguments[0].click();", element)
+        logger.info("✅ Clicked %s", description)
+        if next_locator is not None:
+            wait.until(EC.presence_of_element_located(next_locator))
     except Exception as e:
-        logger.error(f"❌ Error clicking {description}: {e}")
+        logger.error("❌ Error clicking %s: %s", description, e)
         raise HTTPException(status_code=500, detail=f"Could not click {description}: {str(e)}")
 
+def fill_input(driver, element, value):
+    """Set a field's value in one script call
+
+    clear() + send_keys() costs a WebDriver round trip per call (send_keys
+    types key by key); assigning the value and firing the input event in a
+    single injected script is one round trip regardless of length.
+    """
+    driver.execute_script(
+        "arguments[0].value = arguments[1];"
+        "arguments[0].dispatchEvent(new Event('input', {bubbles: true}));",
+        element,
+        value,
+    )
+
+# ========== Login Helper ==========
+
+def _read_profile_email(profile_dir):
+    """Return the account a persistent profile last logged in as, if recorded"""
+    try:
+        with open(os.path.join(profile_dir, ".vayne_account")) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def _remember_driver_email(driver, email):
+    """Track the logged-in account on the driver and its on-disk profile
+
+    The session cookies live in the persistent profile dir, so the account
+    they belong to has to survive there too - an in-memory attribute alone
+    would let a freshly spawned driver reuse the slot's old cookies for
+    whichever email the next request happens to carry.
+    """
+    driver._vayne_email = email
+    profile_dir = getattr(driver, "_vayne_profile_dir", None)
+    if profile_dir:
+        try:
+            with open(os.path.join(profile_dir, ".vayne_account"), "w") as f:
+                f.write(email)
+        except OSError as e:
+            logger.warning("⚠️ Could not record profile account: %s", e)
+
+# Cookies from the last successful login per account - a fresh driver (or one
+# whose own session expired) can be signed in by injection instead of a form
+# POST + redirect round trip
+_session_cache = {}
+_session_cache_lock = threading.Lock()
+
+def login_to_vayne(driver, wait, email, password):
+    """Log into Vayne.io, skipping the form if the session is still valid
+
+    A pooled driver may already hold an authenticated session from a
+    previous request - the server redirects straight past the sign_in page
+    in that case and the form round trip is skipped entirely.
+    """
+    logger.info("🔐 Logging into Vayne.io...")
+    driver.get("https://www.vayne.io/users/sign_in")
+
+    # A pooled driver may still be logged in as a different account - drop
+    # that session rather than reusing it for the wrong user
+    previous_email = getattr(driver, "_vayne_email", None)
+    if previous_email is not None and previous_email != email:
+        logger.info("🧹 Dropping session for a different account")
+        driver.delete_all_cookies()
+        driver.refresh()
+
+    if "sign_in" not in driver.current_url:
+        logger.info("✅ Existing session still valid - skipping login form")
+        _remember_driver_email(driver, email)
+        return
+
+    # Another driver may have logged this account in already - inject its
+    # cookies and let the server redirect us past the form
+    with _session_cache_lock:
+        cached_cookies = _session_cache.get(email)
+    if cached_cookies:
+        logger.info("🍪 Trying cached session cookies...")
+        for cookie in cached_cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException:
+                pass
+        driver.get("https://www.vayne.io/users/sign_in")
+        if "sign_in" not in driver.current_url:
+            logger.info("✅ Cached session accepted - login form skipped")
+            _remember_driver_email(driver, email)
+            return
+        # Stale cookies - forget them and fall through to the form
+        with _session_cache_lock:
+            _session_cache.pop(email, None)
+
+    # Wait for the form, then fill and submit it in one injected script -
+    # a single WebDriver round trip instead of separate find/clear/send_keys
+    # calls for each field
+    safe_find_element(driver, wait, EMAIL_LOC, description="email input")
+    driver.execute_script(
+        """
+        const email = document.getElementById('user_email');
+        const password = document.getElementById('user_password');
+        email.value = arguments[0];
+        password.value = arguments[1];
+        email.dispatchEvent(new Event('input', {bubbles: true}));
+        password.dispatchEvent(new Event('input', {bubbles: true}));
+        password.form.submit();
+        """,
+        email,
+        password,
+    )
+
+    logger.info("⏳ Waiting for login to complete...")
+    try:
+        wait.until(lambda driver: "sign_in" not in driver.current_url)
+        logger.info("✅ Login successful - redirected from sign_in page")
+    except TimeoutException:
+        if "sign_in" in driver.current_url:
+            raise HTTPException(status_code=401, detail="Login failed - still on sign_in page")
+    _remember_driver_email(driver, email)
+    with _session_cache_lock:
+        _session_cache[email] = driver.get_cookies()
+
+def _update_auth_token_via_xhr(driver, auth_token):
+    """Try to update the LinkedIn auth token with one in-page XHR
+
+    The edit page is a plain Rails form; if the current page exposes the
+    CSRF meta tag the PATCH can be fired directly, skipping a full page
+    load plus form fill. Returns False when the shortcut isn't possible so
+    the caller can fall back to the navigation flow.
+    """
+    try:
+        status = driver.execute_async_script(
+            """
+            const done = arguments[arguments.length - 1];
+            const meta = document.querySelector('meta[name=csrf-token]');
+            if (!meta) { done(0); return; }
+            fetch('/linkedin_authentication', {
+                method: 'PATCH',
+                headers: {
+                    'X-CSRF-Token': meta.content,
+                    'Content-Type': 'application/x-www-form-urlencoded'
+                },
+                body: new URLSearchParams({
+                    'linkedin_authentication[auth_token]': arguments[0]
+                }),
+                credentials: 'same-origin'
+            }).then(r => done(r.status)).catch(() => done(0));
+            """,
+            auth_token,
+        )
+        return 200 <= int(status) < 400
+    except (WebDriverException, TypeError, ValueError) as e:
+        logger.warning("⚠️ XHR token update not possible: %s", e)
+        return False
+
 # ========== Endpoint 1: Improved Scrape ==========
 
 @app.post("/run_scrape/")
-def run_scrape(data: ScrapeRequest):
+async def run_scrape(data: ScrapeRequest):
+    async with request_semaphore:
+        return await run_in_threadpool(_run_scrape_sync, data)
+
+def _run_scrape_sync(data: ScrapeRequest):
     driver = None
     try:
         logger.info("🚀 Starting scrape process...")
         
-        # Setup WebDriver
-        driver = setup_chrome_driver()
-        wait = WebDriverWait(driver, 30)
+        # Acquire a warm WebDriver from the pool
+        driver = driver_pool.acquire()
+        wait = driver_wait(driver, 30)
 
         # Step 1: Login to Vayne.io
-        logger.info("🔐 Logging into Vayne.io...")
-        driver.get("https://www.vayne.io/users/sign_in")
-        
-        email_input = safe_find_element(driver, wait, By.ID, "user_email", description="email input")
-        password_input = safe_find_element(driver, wait, By.ID, "user_password", description="password input")
-        
-        email_input.clear()
-        email_input.send_keys(data.email)
-        password_input.clear()
-        password_input.send_keys(data.password + Keys.RETURN)
-        
-        logger.info("✅ Login form submitted")
-        time.sleep(5)
+        login_to_vayne(driver, wait, data.email, data.password)
 
-        # Step 2: Update LinkedIn authentication token
+        # Step 2: Update LinkedIn authentication token - a single in-page
+        # XHR when possible, falling back to the full edit-page navigation
         logger.info("🔑 Updating LinkedIn authentication token...")
-        driver.get("https://www.vayne.io/linkedin_authentication/edit")
-        
-        token_input = safe_find_element(driver, wait, By.CSS_SELECTOR, "input[type='text']", description="auth token input")
-        token_input.clear()
-        token_input.send_keys(data.auth_token)
-        
-        update_button = safe_find_element(driver, wait, By.XPATH, "//button[normalize-space(text())='Update']", description="update button")
-        safe_click(driver, wait, update_button, "update button")
-        
-        logger.info("✅ Auth token updated")
-        time.sleep(3)
+        if _update_auth_token_via_xhr(driver, data.auth_token):
+            logger.info("✅ Auth token updated via XHR")
+        else:
+            driver.get("https://www.vayne.io/linkedin_authentication/edit")
+
+            token_input = safe_find_element(driver, wait, TOKEN_INPUT_LOC, description="auth token input")
+            fill_input(driver, token_input, data.auth_token)
+
+            # Blink's selector engine plus a text check in one script beats
+            # an XPath text scan; fall back to the XPath locator if the page
+            # hasn't rendered the button yet
+            update_button = driver.execute_script(
+                "return [...document.querySelectorAll('button')]"
+                ".find(b => b.textContent.trim() === 'Update') || null;"
+            )
+            if update_button is None:
+                update_button = safe_find_element(driver, wait, UPDATE_BTN_LOC, description="update button")
+            safe_click(driver, wait, update_button, "update button")
+
+            # The page re-renders once the update is accepted - wait for the
+            # old button to go stale instead of sleeping
+            try:
+                wait.until(EC.staleness_of(update_button))
+            except TimeoutException:
+                pass
+
+            logger.info("✅ Auth token updated")
 
         # Step 3: Create new URL check
         logger.info("🔗 Creating URL check...")
         driver.get("https://www.vayne.io/url_checks/new")
         
-        url_input = safe_find_element(driver, wait, By.CSS_SELECTOR, "textarea[name='url_check[url]']", description="URL input")
-        url_input.clear()
-        url_input.send_keys(data.linkedin_url)
-        
-        check_button = safe_find_element(driver, wait, By.XPATH, "//a[@data-action='order-creation#checkUrl']", description="check URL button")
-        safe_click(driver, wait, check_button, "check URL button")
+        url_input = safe_find_element(driver, wait, URL_INPUT_LOC, description="URL input")
+        fill_input(driver, url_input, data.linkedin_url)
         
+        check_button = safe_find_element(driver, wait, CHECK_URL_BTN_LOC, description="check URL button")
+        safe_click(driver, wait, check_button, "check URL button", next_locator=ORDER_LIMIT_LOC)
+
         logger.info("✅ URL check initiated")
-        time.sleep(10)
 
-        # Step 4: Set number of leads
-        logger.info(f"🔢 Setting number of leads to: {data.number}")
-        limit_input = safe_find_element(driver, wait, By.ID, "order_limit", description="order limit input")
-        limit_input.clear()
-        limit_input.send_keys(data.number)
+        # Step 4: Set number of leads - the order form appearing is the
+        # signal that the URL check finished, so wait on that directly
+        logger.info("🔢 Setting number of leads to: %s", data.number)
+        limit_input = safe_find_element(driver, wait, ORDER_LIMIT_LOC, description="order limit input")
+        fill_input(driver, limit_input, data.number)
         
-        logger.info(f"✅ Number of leads set to: {data.number}")
-        time.sleep(5)
+        logger.info("✅ Number of leads set to: %s", data.number)
 
         # Step 5: Create order
         logger.info("📋 Creating order...")
-        create_button = safe_find_element(driver, wait, By.XPATH, "//input[@type='submit' and @value='Create Order']", description="create order button")
+        create_button = safe_find_element(driver, wait, CREATE_ORDER_BTN_LOC, description="create order button")
         safe_click(driver, wait, create_button, "create order button")
-        
+
         logger.info("✅ Order creation initiated")
-        time.sleep(10)
-
-        # Step 6: Get order ID from orders page
-        logger.info("📄 Retrieving order details...")
-        driver.get("https://www.vayne.io/orders")
-        time.sleep(10)
-        orders_container = safe_find_element(driver, wait, By.ID, "order_items_leads", description="orders container")
-        latest_order_div = orders_container.find_element(By.CSS_SELECTOR, "li.col-span-1")
-        latest_order_id = latest_order_div.get_attribute("id")
-        
-        if not latest_order_id:
-            raise HTTPException(status_code=500, detail="Could not retrieve order ID")
-            
-        order_id = latest_order_id.split("_")[-1]
+
+        # Wait for the post-submit redirect onto the orders pages instead of
+        # sleeping through it
+        try:
+            wait.until(EC.url_contains("/orders"))
+        except TimeoutException:
+            logger.warning("⚠️ No redirect to /orders observed after order creation")
+
+        # Step 6: The redirect usually lands on /orders/<id> directly - take
+        # the ID from the URL and skip reloading the orders page
+        order_id = None
+        url_match = _ORDER_URL_RE.search(driver.current_url)
+        if url_match:
+            order_id = url_match.group(1)
+            logger.info("✅ Order ID taken from redirect URL")
+        else:
+            # Fallback: scrape the newest order off the orders page
+            logger.info("📄 Retrieving order details...")
+            driver.get("https://www.vayne.io/orders")
+            orders_container = safe_find_element(driver, wait, ORDERS_CONTAINER_LOC, description="orders container")
+            latest_order_div = orders_container.find_element(*LATEST_ORDER_LOC)
+            latest_order_id = latest_order_div.get_attribute("id")
+
+            if not latest_order_id:
+                raise HTTPException(status_code=500, detail="Could not retrieve order ID")
+
+            order_id = latest_order_id.split("_")[-1]
         csv_url = f"https://www.vayne.io/orders/{order_id}/download_export"
         
-        logger.info(f"✅ Order created successfully with ID: {order_id}")
+        logger.info("✅ Order created successfully with ID: %s", order_id)
         
         return {
             "status": "success",
@@ -339,97 +926,97 @@ def run_scrape(data: ScrapeRequest):
     except Exception as e:
         error_traceback = traceback.format_exc()
         logger.error("❌ Unexpected error in run_scrape: %s\nTraceback: %s", e, error_traceback)
+        # A driver that blew up mid-flow may be wedged - don't pool it
+        if driver:
+            driver_pool.discard(driver)
+            driver = None
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
     finally:
         if driver:
-            try:
-                driver.quit()
-                logger.info("🧹 WebDriver cleanup completed")
-            except Exception as e:
-                logger.warning("⚠️ Error during WebDriver cleanup: %s", e)
+            driver_pool.release(driver)
+            logger.info("🧹 WebDriver returned to pool")
+
+# ========== Endpoint 1b: Batch Scrape ==========
+
+@app.post("/run_scrape_batch/")
+async def run_scrape_batch(requests_in: List[ScrapeRequest]):
+    """Run several scrapes concurrently across the warm driver pool
+
+    Each entry takes its own semaphore slot and pooled driver, so the batch
+    fans out up to the pool size and queues beyond it. Failures are reported
+    per entry instead of failing the whole batch.
+    """
+    async def run_one(req: ScrapeRequest):
+        async with request_semaphore:
+            return await run_in_threadpool(_run_scrape_sync, req)
+
+    outcomes = await asyncio.gather(*(run_one(r) for r in requests_in), return_exceptions=True)
+
+    results = []
+    for req, outcome in zip(requests_in, outcomes):
+        if isinstance(outcome, HTTPException):
+            results.append({"status": "error", "linkedin_url": req.linkedin_url, "error": outcome.detail})
+        elif isinstance(outcome, Exception):
+            results.append({"status": "error", "linkedin_url": req.linkedin_url, "error": str(outcome)})
+        else:
+            results.append(outcome)
+
+    succeeded = sum(1 for r in results if r.get("status") == "success")
+    return {
+        "status": "completed",
+        "total": len(results),
+        "successful": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
 
 # ========== Endpoint 2: Simplified Download CSV ==========
 
 @app.post("/download_csv/")
-def download_csv(data: UploadRequest):
+async def download_csv(data: UploadRequest):
     """Downloads a CSV file and returns it as a file response"""
-    # Use absolute path to ensure proper directory creation
-    DOWNLOAD_DIR = r"C:\developer\Vayne\selenium\downloads"
+    async with request_semaphore:
+        return await run_in_threadpool(_download_csv_sync, data)
+
+def _download_csv_sync(data: UploadRequest):
     driver = None
-    downloaded_file = None
-    
+
     try:
         logger.info("📁 Starting CSV download process...")
-        
-        # Create download directory if it doesn't exist
-        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-        
-        # Clear any existing files in the download directory
-        for existing_file in glob.glob(os.path.join(DOWNLOAD_DIR, "*")):
-            try:
-                os.remove(existing_file)
-                logger.info(f"🧹 Removed existing file: {os.path.basename(existing_file)}")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not remove {existing_file}: {e}")
 
-        # Setup Chrome with download preferences
-        driver = setup_chrome_driver(download_dir=DOWNLOAD_DIR)
-        wait = WebDriverWait(driver, 60)
+        # Acquire a warm driver (login only - the download itself goes over HTTP)
+        driver = driver_pool.acquire()
+        wait = driver_wait(driver, 60)
 
         # Step 1: Login to Vayne.io (REQUIRED before download)
-        logger.info("🔐 Logging into Vayne.io for download...")
-        driver.get("https://www.vayne.io/users/sign_in")
-        
-        email_input = safe_find_element(driver, wait, By.ID, "user_email", description="email input")
-        password_input = safe_find_element(driver, wait, By.ID, "user_password", description="password input")
-        
-        email_input.clear()
-        email_input.send_keys(data.email)
-        password_input.clear()
-        password_input.send_keys(data.password + Keys.RETURN)
-        
-        logger.info("⏳ Waiting for login to complete...")
-        time.sleep(8)
+        login_to_vayne(driver, wait, data.email, data.password)
 
-        # Step 2: Verify login success by checking URL change
-        try:
-            wait.until(lambda driver: "sign_in" not in driver.current_url)
-            logger.info("✅ Login successful - redirected from sign_in page")
-        except TimeoutException:
-            logger.warning("⚠️ Login verification timeout - checking current URL")
-            current_url = driver.current_url
-            logger.info(f"Current URL: {current_url}")
-            if "sign_in" in current_url:
-                raise HTTPException(status_code=401, detail="Login failed - still on sign_in page")
-
-        # Step 3: Navigate to download URL 
-        logger.info(f"⬇️ Accessing download URL: {data.download_link}")
-        driver.get(data.download_link)
-        
-        # Wait a moment for page/download to load
-        time.sleep(5)
-        
-        # Step 4: Check if we got HTML (error page) instead of file download
-        current_url = driver.current_url
-        page_source = driver.page_source
-        
-        # If we're still on the same URL and have HTML content, it means no download occurred
-        if current_url == data.download_link and len(page_source) > 1000:
+        # Step 2: Hand the authenticated cookies to a plain HTTP session and
+        # return the browser - the export is a simple GET, no rendering needed
+        session = session_from_driver(driver)
+        driver_pool.release(driver)
+        driver = None
+        logger.info("🧹 WebDriver returned to pool after login - streaming download over HTTP")
+
+        logger.info("⬇️ Accessing download URL: %s", data.download_link)
+        response = session.get(data.download_link, stream=True, timeout=120)
+
+        # Step 3: Check if we got HTML (error page) instead of file download
+        content_type = response.headers.get("Content-Type", "")
+        if "text/html" in content_type:
             logger.warning("⚠️ Received HTML page instead of file download - file still processing")
-            logger.info(f"Current URL: {current_url}")
-            logger.info(f"Page source length: {len(page_source)} characters")
-            
+
             # Check for specific error messages in the HTML
-            html_lower = page_source.lower()
+            html_lower = response.text.lower()
             error_message = "File is still being processed"
-            
+
             if "something went wrong" in html_lower:
                 error_message = "Server error - file may still be processing"
             elif "not found" in html_lower:
                 error_message = "File not found - may not be generated yet"
             elif "error" in html_lower:
                 error_message = "Server error encountered"
-            
+
             return {
                 "status": "processing",
                 "message": "File is still being processed",
@@ -439,169 +1026,227 @@ def download_csv(data: UploadRequest):
                 "download_url": data.download_link,
                 "response_type": "html"
             }
-        
-        # Step 5: If no HTML error page, check for actual file download
-        logger.info("✅ No error page detected - checking for downloaded file...")
-        
-        try:
-            # Wait for download to complete (shorter timeout since we already waited)
-            downloaded_file = wait_for_download(DOWNLOAD_DIR, timeout=30)
-            logger.info("✅ File download detected!")
-            
-        except TimeoutError:
-            # No file was downloaded, but also no error page - might be a redirect or other issue
-            logger.warning("⚠️ No file download detected and no clear error page")
-            return {
-                "status": "processing", 
-                "message": "No file download occurred - likely still processing",
-                "suggestion": "Please try again in a few minutes",
-                "run_id": data.run_id,
-                "download_url": data.download_link,
-                "response_type": "no_download"
-            }
-        
-        # Close driver early to free resources
-        if driver:
-            driver.quit()
-            driver = None
-            logger.info("🧹 WebDriver closed after download")
 
-        # Step 6: Verify file exists and has content
-        if not os.path.exists(downloaded_file):
-            raise FileNotFoundError("Downloaded file not found")
-            
-        file_size = os.path.getsize(downloaded_file)
-        if file_size == 0:
-            raise ValueError("Downloaded file is empty")
-            
-        original_filename = os.path.basename(downloaded_file)
+        # Step 4: Stream the export straight through to the caller - the
+        # bytes never touch disk on their way from Vayne to the response
+        logger.info("✅ File response detected - streaming to caller...")
+        response.raise_for_status()
+
+        original_filename = "export.csv"
+        disposition = response.headers.get("Content-Disposition", "")
+        if "filename=" in disposition:
+            original_filename = disposition.split("filename=")[-1].strip().strip('"') or original_filename
+
         new_filename = f"vayne_export_{data.run_id}.csv"
-        
-        logger.info(f"✅ CSV file downloaded successfully. Size: {file_size} bytes, Name: {original_filename}")
-        
-        # Step 7: Return the file as a response
-        return FileResponse(
-            path=downloaded_file,
+        headers = {
+            "Content-Disposition": f"attachment; filename={new_filename}",
+            "X-Run-ID": data.run_id,
+            "X-Original-Filename": original_filename,
+            "X-Download-Status": "completed"
+        }
+        if "Content-Length" in response.headers:
+            headers["X-File-Size"] = response.headers["Content-Length"]
+
+        logger.info("✅ Streaming CSV export to caller as: %s", new_filename)
+
+        return StreamingResponse(
+            response.iter_content(chunk_size=64 * 1024),
             media_type='text/csv',
-            filename=new_filename,
-            headers={
-                "Content-Disposition": f"attachment; filename={new_filename}",
-                "X-Run-ID": data.run_id,
-                "X-File-Size": str(file_size),
-                "X-Original-Filename": original_filename,
-                "X-Download-Status": "completed"
-            }
+            headers=headers
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         error_traceback = traceback.format_exc()
         logger.error("❌ Error in download_csv: %s\nTraceback: %s", e, error_traceback)
-        
-        # Clean up the file if it was downloaded but an error occurred
-        if downloaded_file and os.path.exists(downloaded_file):
-            try:
-                os.remove(downloaded_file)
-                logger.info("🧹 Cleaned up downloaded file after error")
-            except:
-                pass
-        
+        if driver:
+            driver_pool.discard(driver)
+            driver = None
         raise HTTPException(status_code=500, detail=f"CSV download failed: {str(e)}")
 
     finally:
-        # Cleanup WebDriver if still open
+        # Return the WebDriver if still held
         if driver:
+            driver_pool.release(driver)
+            logger.info("🧹 WebDriver returned to pool")
+
+# ========== Endpoint: Batch Download CSVs ==========
+
+MAX_DOWNLOAD_WORKERS = 5  # Stay under Vayne rate limits
+
+@app.post("/download_csv_batch/")
+async def download_csv_batch(data: BatchDownloadRequest):
+    """Logs in once and downloads several exports concurrently over HTTP"""
+    async with request_semaphore:
+        return await run_in_threadpool(_download_csv_batch_sync, data)
+
+def _download_csv_batch_sync(data: BatchDownloadRequest):
+    driver = None
+
+    try:
+        logger.info("📁 Starting batch download of %s exports...", len(data.download_links))
+
+        batch_dir = os.path.join(DOWNLOAD_ROOT, f"batch_{data.run_id}")
+        os.makedirs(batch_dir, exist_ok=True)
+
+        # Login once with a pooled browser, then hand off to HTTP
+        driver = driver_pool.acquire()
+        wait = driver_wait(driver, 60)
+
+        login_to_vayne(driver, wait, data.email, data.password)
+
+        session = session_from_driver(driver)
+        driver_pool.release(driver)
+        driver = None
+        logger.info("🧹 WebDriver returned to pool after login - downloading exports over HTTP")
+
+        def fetch_export(index_and_link):
+            index, link = index_and_link
             try:
-                driver.quit()
-                logger.info("🧹 WebDriver cleanup completed")
+                response = session.get(link, stream=True, timeout=120)
+
+                if "text/html" in response.headers.get("Content-Type", ""):
+                    return {
+                        "status": "processing",
+                        "message": "File is still being processed",
+                        "download_url": link
+                    }
+
+                response.raise_for_status()
+
+                # Keep the index in the name: several entries can carry the
+                # same disposition filename (or the same link twice) and the
+                # workers would otherwise write over each other. basename()
+                # strips any path components, and the split drops ;-params.
+                filename = f"export_{index}.csv"
+                disposition = response.headers.get("Content-Disposition", "")
+                if "filename=" in disposition:
+                    server_name = disposition.split("filename=")[-1].split(";")[0].strip().strip('"')
+                    server_name = os.path.basename(server_name)
+                    if server_name:
+                        filename = f"{index}_{server_name}"
+
+                file_path = os.path.join(batch_dir, filename)
+                with open(file_path, "wb") as f:
+                    # iter_content decodes any Content-Encoding; raw socket
+                    # bytes would leave a gzipped body on disk as-is
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+
+                return {
+                    "status": "success",
+                    "download_url": link,
+                    "file": file_path,
+                    "size": os.path.getsize(file_path)
+                }
             except Exception as e:
-                logger.warning("⚠️ Error during WebDriver cleanup: %s", e)
+                logger.error("❌ Batch download failed for %s: %s", link, e)
+                return {"status": "error", "download_url": link, "detail": str(e)}
+
+        # The downloads are independent I/O - fan them out over a bounded pool
+        with ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as executor:
+            results = list(executor.map(fetch_export, enumerate(data.download_links)))
+
+        succeeded = sum(1 for r in results if r["status"] == "success")
+        logger.info("✅ Batch download finished: %s/%s succeeded", succeeded, len(results))
+
+        return {
+            "status": "completed",
+            "run_id": data.run_id,
+            "succeeded": succeeded,
+            "results": results
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_traceback = traceback.format_exc()
+        logger.error("❌ Error in download_csv_batch: %s\nTraceback: %s", e, error_traceback)
+        if driver:
+            driver_pool.discard(driver)
+            driver = None
+        raise HTTPException(status_code=500, detail=f"Batch download failed: {str(e)}")
+    finally:
+        if driver:
+            driver_pool.release(driver)
+            logger.info("🧹 WebDriver returned to pool")
 
 # ========== Endpoint 3: Alternative - Return CSV content as text/csv ==========
 
 @app.post("/download_csv_content/")
-def download_csv_content(data: UploadRequest):
+async def download_csv_content(data: UploadRequest):
     """Alternative endpoint that downloads the CSV and returns its content"""
-    DOWNLOAD_DIR = r"C:\developer\Vayne\selenium\downloads"
+    async with request_semaphore:
+        return await run_in_threadpool(_download_csv_content_sync, data)
+
+def _download_csv_content_sync(data: UploadRequest):
+    # This endpoint relies on Chrome writing the file where this process can
+    # read it. On a grid the browser runs on another host, the CDP download
+    # redirect is unavailable, and the wait would just time out after 120s -
+    # fail fast instead of hanging.
+    if GRID_URL:
+        raise HTTPException(
+            status_code=501,
+            detail="/download_csv_content/ needs a local Chrome; with SELENIUM_GRID_URL set the file lands on the grid node. Use /download_csv/ instead.",
+        )
+
+    # Per-request temp dir - concurrent requests can't trample each other's
+    # files and there is nothing stale to clear first
+    DOWNLOAD_DIR = tempfile.mkdtemp(prefix="vayne_dl_", dir=_TMPFS_BASE)
     driver = None
-    
+
     try:
         logger.info("📁 Starting CSV download process...")
-        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-
-        # Clear existing files
-        for existing_file in glob.glob(os.path.join(DOWNLOAD_DIR, "*")):
-            try:
-                os.remove(existing_file)
-            except:
-                pass
 
-        # Setup Chrome with download preferences
-        driver = setup_chrome_driver(download_dir=DOWNLOAD_DIR)
-        wait = WebDriverWait(driver, 60)
+        # Acquire a pooled driver and point its downloads at our directory
+        driver = driver_pool.acquire()
+        configure_download_dir(driver, DOWNLOAD_DIR)
+        wait = driver_wait(driver, 60)
 
         # Login to Vayne.io
-        logger.info("🔐 Logging into Vayne.io for download...")
-        driver.get("https://www.vayne.io/users/sign_in")
-        
-        email_input = safe_find_element(driver, wait, By.ID, "user_email", description="email input")
-        password_input = safe_find_element(driver, wait, By.ID, "user_password", description="password input")
-        
-        email_input.clear()
-        email_input.send_keys(data.email)
-        password_input.clear()
-        password_input.send_keys(data.password + Keys.RETURN)
-        time.sleep(8)
-
-        # Download file by navigating to URL
-        logger.info(f"⬇️ Downloading CSV file from: {data.download_link}")
+        login_to_vayne(driver, wait, data.email, data.password)
+
+        # Download file by navigating to URL; snapshot the dir first so a
+        # download that completes instantly isn't mistaken for an old file
+        preexisting = snapshot_download_dir(DOWNLOAD_DIR)
+        logger.info("⬇️ Downloading CSV file from: %s", data.download_link)
         driver.get(data.download_link)
-        time.sleep(3)
-        
-        downloaded_file = wait_for_download(DOWNLOAD_DIR, timeout=120)
 
-        # Read the CSV file content
-        logger.info("📄 Reading CSV file content...")
-        with open(downloaded_file, 'r', encoding='utf-8') as file:
-            csv_content = file.read()
-        
-        file_size = len(csv_content.encode('utf-8'))
+        downloaded_file = wait_for_download(DOWNLOAD_DIR, timeout=120, preexisting=preexisting)
+
+        file_size = os.path.getsize(downloaded_file)
         file_name = f"vayne_export_{data.run_id}.csv"
-        
-        logger.info(f"✅ CSV file read successfully. Size: {file_size} bytes")
-        
-        # Return CSV content with proper headers
-        from fastapi.responses import Response
-        return Response(
-            content=csv_content,
+
+        logger.info("✅ CSV file downloaded successfully. Size: %s bytes", file_size)
+
+        # Send the file straight from disk (sendfile on Linux, O(1) memory)
+        # and remove the temp dir only after the body has gone out
+        return FileResponse(
+            downloaded_file,
             media_type='text/csv',
+            filename=file_name,
             headers={
-                "Content-Disposition": f"attachment; filename={file_name}",
                 "X-Run-ID": data.run_id,
                 "X-File-Size": str(file_size)
-            }
+            },
+            background=BackgroundTask(shutil.rmtree, DOWNLOAD_DIR, True)
         )
 
     except Exception as e:
         error_traceback = traceback.format_exc()
         logger.error("❌ Error in download_csv_content: %s\nTraceback: %s", e, error_traceback)
+        shutil.rmtree(DOWNLOAD_DIR, ignore_errors=True)
+        if driver:
+            driver_pool.discard(driver)
+            driver = None
         raise HTTPException(status_code=500, detail=f"CSV download failed: {str(e)}")
 
     finally:
         # Cleanup
         if driver:
-            try:
-                driver.quit()
-                logger.info("🧹 WebDriver cleanup completed")
-            except Exception as e:
-                logger.warning("⚠️ Error during WebDriver cleanup: %s", e)
-        
-        # Clean up download directory
-        try:
-            for file in glob.glob(os.path.join(DOWNLOAD_DIR, "*")):
-                os.remove(file)
-            logger.info("🧹 Download directory cleanup completed")
-        except Exception as e:
-            logger.warning("⚠️ Error during directory cleanup: %s", e)
+            driver_pool.release(driver)
+            logger.info("🧹 WebDriver returned to pool")
 
 # ========== Cleanup Task for Old Downloads ==========
 
@@ -610,26 +1255,22 @@ def cleanup_old_downloads(directory: str, max_age_hours: int = 1):
     if not os.path.exists(directory):
         return
     
-    current_time = time.time()
-    for item in os.listdir(directory):
-        item_path = os.path.join(directory, item)
-        if os.path.isfile(item_path):
-            file_age_hours = (current_time - os.path.getctime(item_path)) / 3600
-            if file_age_hours > max_age_hours:
-                try:
-                    os.remove(item_path)
-                    logger.info(f"🧹 Cleaned up old file: {item}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not delete old file {item}: {e}")
-        elif os.path.isdir(item_path):
-            # Clean up old session directories
-            dir_age_hours = (current_time - os.path.getctime(item_path)) / 3600
-            if dir_age_hours > max_age_hours:
-                try:
-                    shutil.rmtree(item_path)
-                    logger.info(f"🧹 Cleaned up old directory: {item}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not delete old directory {item}: {e}")
+    cutoff = time.time() - max_age_hours * 3600
+    # Single scandir pass; DirEntry caches the stat from the directory read
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.stat(follow_symlinks=False).st_ctime > cutoff:
+                    continue
+                if entry.is_file(follow_symlinks=False):
+                    os.remove(entry.path)
+                    logger.info("🧹 Cleaned up old file: %s", entry.name)
+                elif entry.is_dir(follow_symlinks=False):
+                    # Clean up old session directories
+                    shutil.rmtree(entry.path)
+                    logger.info("🧹 Cleaned up old directory: %s", entry.name)
+            except Exception as e:
+                logger.warning("⚠️ Could not delete old entry %s: %s", entry.name, e)
 
 # ========== Health Check Endpoint ==========
 
@@ -640,20 +1281,12 @@ def health_check():
 @app.get("/")
 def root():
     return {
-        "message": "Vayne.io Scraper API", 
-        "endpoints": [
-            "/run_scrape",
-            "/download_csv (returns file)",
-            "/download_csv_content (returns CSV with headers)",
-            "/download_csv_direct (simplified direct download)",
-            "/health"
-        ]
-    }
-    return {
-        "message": "Vayne.io Scraper API", 
+        "message": "Vayne.io Scraper API",
         "endpoints": [
             "/run_scrape",
+            "/run_scrape_batch (runs several scrapes concurrently)",
             "/download_csv (returns file)",
+            "/download_csv_batch (downloads several exports concurrently)",
             "/download_csv_content (returns CSV with headers)",
             "/health"
         ]
@@ -664,10 +1297,16 @@ def root():
 @app.on_event("startup")
 async def startup_event():
     """Clean up old downloads on startup"""
-    DOWNLOAD_DIR = r"C:\developer\Vayne\selenium\downloads"
-    cleanup_old_downloads(DOWNLOAD_DIR, max_age_hours=1)
+    cleanup_old_downloads(DOWNLOAD_ROOT, max_age_hours=1)
+    driver_pool.prefill()
     logger.info("🚀 FastAPI application started, old downloads cleaned")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Quit all pooled drivers so no Chrome processes are leaked"""
+    driver_pool.drain()
+    logger.info("🧹 Driver pool drained")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file